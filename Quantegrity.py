@@ -1,15 +1,21 @@
 import hashlib
+import hmac
 import random
 import string
-from qiskit import QuantumCircuit, QuantumRegister, ClassicalRegister, transpile
+from qiskit import QuantumCircuit
 from qiskit_aer import AerSimulator
-import numpy as np
+
+# Characters used for ballot confirmation codes
+CODE_ALPHABET = string.ascii_uppercase + string.digits
 
 # Quantum Key Distribution functions
 def sedjo(A, B):
     Sa = A[::-1]
     Sb = B[::-1]
     n = len(A)
+    # Qubits of each register that the secret keys act on
+    qubits_a = [i for i in range(n) if Sa[i] == '0']
+    qubits_b = [i+n+1 for i in range(n) if Sb[i] == '0']
     circuit = QuantumCircuit(2*n + 2, 2*n)
 
     # Initialize input register
@@ -27,12 +33,8 @@ def sedjo(A, B):
 
     # Apply secret keys (simulating Alice and Bob's inputs)
     # Layer 01
-    for char in range(n):
-        if Sa[char] == '0':
-            circuit.z(char)
-    for char in range(n):
-        if Sb[char] == '0':
-            circuit.z(char+n+1)
+    circuit.z(qubits_a)
+    circuit.z(qubits_b)
     circuit.barrier()
 
     # Layer 02
@@ -42,12 +44,8 @@ def sedjo(A, B):
     circuit.barrier()
 
     # Layer 03
-    for char in range(n):
-        if Sa[char] == '0':
-            circuit.x(char)
-    for char in range(n):
-        if Sb[char] == '0':
-            circuit.x(char+n+1)
+    circuit.x(qubits_a)
+    circuit.x(qubits_b)
     circuit.barrier()
 
     # Set output
@@ -62,8 +60,8 @@ def sedjo(A, B):
     for i in range(n):
         circuit.measure(i+n+1 ,i+n)
 
-    # Execute the circuit
-    result = AerSimulator().run(circuit, shots=1024, memory=True).result()
+    # Execute the circuit; a single shot yields the shared key pair
+    result = AerSimulator().run(circuit, shots=1).result()
     counts = result.get_counts()
     quantum_key = list(counts.keys())[0]
     key_A = quantum_key[0:n]
@@ -72,21 +70,26 @@ def sedjo(A, B):
 
 def qrng(n):
     circuit = QuantumCircuit(n, n)
-    for i in range(n):
-        circuit.h(i)
+    circuit.h(range(n))
     circuit.measure(range(n), range(n))
-    result = AerSimulator().run(circuit, shots=1024, memory=True).result()
+    result = AerSimulator().run(circuit, shots=1).result()
     counts = result.get_counts()
     quantum_key = list(counts.keys())[0]
     return quantum_key
 
 def xor(a, b):
-    return ''.join([str(int(x) ^ int(y)) for x, y in zip(a, b)])
+    # XOR the bitstrings as integers; like zip(), stop at the shorter input
+    n = min(len(a), len(b))
+    if n == 0:
+        return ''
+    return format(int(a[:n], 2) ^ int(b[:n], 2), f'0{n}b')
 
 def hex_to_binary(hex_string):
     return bin(int(hex_string, 16))[2:].zfill(len(hex_string) * 4)
 
 class Voter:
+    __slots__ = ("name", "national_id", "biometric_signature", "voter_id", "quantum_key")
+
     def __init__(self, name, national_id, biometric_signature):
         self.name = name
         self.national_id = national_id
@@ -95,7 +98,7 @@ class Voter:
         self.quantum_key = self.generate_quantum_key()
 
     def generate_voter_id(self):
-        return hashlib.sha256(f"{self.name}{self.national_id}{self.biometric_signature}".encode()).hexdigest()[:16]
+        return hashlib.blake2b(f"{self.name}{self.national_id}{self.biometric_signature}".encode(), digest_size=8).hexdigest()
 
     def generate_quantum_key(self):
         temp_key = qrng(128)
@@ -104,15 +107,23 @@ class Voter:
         return quantum_key
 
 class Ballot:
+    __slots__ = ("ballot_id", "questions", "codes", "marked_options", "status")
+
     def __init__(self, ballot_id, questions):
         self.ballot_id = ballot_id
         self.questions = questions
-        self.codes = {q: {o: self.generate_code() for o in options} for q, options in questions.items()}
+        self.codes = self.generate_codes()
         self.marked_options = {}
         self.status = "Not Cast"  # Can be "Not Cast", "Cast", "Audited", or "Spoiled"
 
-    def generate_code(self):
-        return ''.join(random.choices(string.ascii_uppercase + string.digits, k=3))
+    def generate_codes(self):
+        # Draw the characters for every code on the ballot in a single call
+        options = [(q, o) for q, opts in self.questions.items() for o in opts]
+        chars = ''.join(random.choices(CODE_ALPHABET, k=3 * len(options)))
+        codes = {q: {} for q in self.questions}
+        for i, (q, o) in enumerate(options):
+            codes[q][o] = chars[3*i:3*i+3]
+        return codes
 
     def mark(self, question, option):
         self.marked_options[question] = option
@@ -129,6 +140,7 @@ class ElectionAuthority:
         self.table_q = {}
         self.table_s = self.create_table_s()
         self.tables_r = [self.create_table_r() for _ in range(10)]
+        self.r_entries_by_q, self.r_entries_by_ballot = self.index_tables_r()
         self.cast_votes = []
         self.audited_ballots = []
         self.spoiled_ballots = []
@@ -166,20 +178,33 @@ class ElectionAuthority:
 
     def create_table_r(self):
         table_r = []
+        options = {q: list(o) for q, o in self.questions.items()}
         for voter_id in self.voter_records:
             for ballot_index in range(2):
                 for question in self.questions:
+                    question_options = options[question]
                     for i, code in enumerate(self.table_q[voter_id][question][ballot_index]):
                         q_pointer = (voter_id, ballot_index, question, i)
-                        s_pointer = (question, list(self.questions[question])[i % len(self.questions[question])])
+                        s_pointer = (question, question_options[i % len(question_options)])
                         table_r.append({"flag": False, "q_pointer": q_pointer, "s_pointer": s_pointer})
         random.shuffle(table_r)
         return table_r
 
+    def index_tables_r(self):
+        # Index R table entries by Q-pointer and by ballot so that casting
+        # or spoiling a ballot does not scan every table
+        by_q = {}
+        by_ballot = {}
+        for table_r in self.tables_r:
+            for entry in table_r:
+                by_q.setdefault(entry["q_pointer"], []).append(entry)
+                by_ballot.setdefault(entry["q_pointer"][:2], []).append(entry)
+        return by_q, by_ballot
+
     def authorize_voter(self, voter_id, biometric_signature):
-        if voter_id not in self.voter_records:
+        voter = self.voter_records.get(voter_id)
+        if voter is None:
             return False
-        voter = self.voter_records[voter_id]
         if voter["biometric_signature"] != biometric_signature:
             return False
         if voter["has_voted"]:
@@ -196,7 +221,7 @@ class ElectionAuthority:
 
     def validate_otp(self, voter_id, received_otp, voter_qk, authority_qk, original_otp):
         decrypted_otp = xor(voter_qk[:32], received_otp)
-        return decrypted_otp == original_otp
+        return hmac.compare_digest(decrypted_otp, original_otp)
 
     def get_ballot(self, voter_id):
         if voter_id not in self.ballots:
@@ -207,23 +232,21 @@ class ElectionAuthority:
 
     def cast_vote(self, ballot, choices):
         if ballot.status == "Not Cast":
-            for question, option in choices.items():
-                ballot.mark(question, option)
+            voter_id, ballot_number = ballot.ballot_id.split('-')
+            ballot_index = int(ballot_number) - 1
             ballot.status = "Cast"
             for question, option in choices.items():
+                ballot.mark(question, option)
                 code = ballot.get_code(question)
                 self.cast_votes.append((ballot.ballot_id, question, code))
 
                 # Update Tables R and S
-                for table_r in self.tables_r:
-                    for entry in table_r:
-                        if (entry["q_pointer"][0] == ballot.ballot_id.split('-')[0] and
-                            entry["q_pointer"][2] == question and
-                            self.table_q[ballot.ballot_id.split('-')[0]][question][int(ballot.ballot_id.split('-')[1]) - 1][entry["q_pointer"][3]] == code):
-                            entry["flag"] = True
-                            self.table_s[question][option].add(code)
-                            break
-            self.voter_records[ballot.ballot_id.split('-')[0]]["has_voted"] = True
+                q_codes = self.table_q[voter_id][question][ballot_index]
+                q_pointer = (voter_id, ballot_index, question, q_codes.index(code))
+                for entry in self.r_entries_by_q.get(q_pointer, ()):
+                    entry["flag"] = True
+                    self.table_s[question][option].add(code)
+            self.voter_records[voter_id]["has_voted"] = True
         else:
             raise ValueError("Ballot has already been cast, audited, or spoiled")
 
@@ -232,10 +255,10 @@ class ElectionAuthority:
             ballot.status = "Spoiled"
             self.spoiled_ballots.append(ballot)
             # Reveal all information for this ballot in all R tables
-            for table_r in self.tables_r:
-                for entry in table_r:
-                    if entry["q_pointer"][0] == ballot.ballot_id.split('-')[0] and entry["q_pointer"][1] == int(ballot.ballot_id.split('-')[1]) - 1:
-                        entry["flag"] = True
+            voter_id, ballot_number = ballot.ballot_id.split('-')
+            ballot_index = int(ballot_number) - 1
+            for entry in self.r_entries_by_ballot.get((voter_id, ballot_index), ()):
+                entry["flag"] = True
         else:
             raise ValueError("Ballot has already been cast, audited, or spoiled")
 
@@ -270,42 +293,39 @@ class QuantegrityVotingSystem:
         return self.election_authority.get_results()
 
     def print_tables(self):
-        print("Table Q:")
+        lines = ["Table Q:"]
         for voter_id, questions in self.election_authority.table_q.items():
-            print(f"{voter_id}:")
+            lines.append(f"{voter_id}:")
             for question, ballots in questions.items():
-                print(f"  {question}:")
-                for i, codes in enumerate(ballots):
-                    print(f"    Ballot {i+1}: {codes}")
-        print()
+                lines.append(f"  {question}:")
+                lines.extend(f"    Ballot {i+1}: {codes}" for i, codes in enumerate(ballots))
+        lines.append("")
 
-        print("Table S:")
+        lines.append("Table S:")
         for question, options in self.election_authority.table_s.items():
-            print(f"{question}:")
-            for option, codes in options.items():
-                print(f"  {option}: {codes}")
-        print()
+            lines.append(f"{question}:")
+            lines.extend(f"  {option}: {codes}" for option, codes in options.items())
+        lines.append("")
 
-        print("Tables R (showing only the first table):")
-        for entry in self.election_authority.tables_r[0]:
-            print(f"Flag: {entry['flag']}, Q-Pointer: {entry['q_pointer']}, S-Pointer: {entry['s_pointer']}")
-        print()
+        lines.append("Tables R (showing only the first table):")
+        lines.extend(f"Flag: {entry['flag']}, Q-Pointer: {entry['q_pointer']}, S-Pointer: {entry['s_pointer']}"
+                     for entry in self.election_authority.tables_r[0])
+        lines.append("")
+        print("\n".join(lines))
 
     def print_results(self):
         results = self.get_results()
-        print("Election Results:")
+        lines = ["Election Results:"]
         for question, options in results.items():
-            print(f"{question}:")
-            for option, votes in options.items():
-                print(f"  {option}: {votes} votes")
+            lines.append(f"{question}:")
+            lines.extend(f"  {option}: {votes} votes" for option, votes in options.items())
 
-        print("\nCast Votes (Ballot ID, Question, Code):")
-        for vote in self.election_authority.cast_votes:
-            print(f"{vote[0]}, {vote[1]}: {vote[2]}")
+        lines.append("\nCast Votes (Ballot ID, Question, Code):")
+        lines.extend(f"{vote[0]}, {vote[1]}: {vote[2]}" for vote in self.election_authority.cast_votes)
 
-        print("\nSpoiled Ballots:")
-        for ballot in self.election_authority.spoiled_ballots:
-            print(ballot.ballot_id)
+        lines.append("\nSpoiled Ballots:")
+        lines.extend(ballot.ballot_id for ballot in self.election_authority.spoiled_ballots)
+        print("\n".join(lines))
 
 def run_election_simulation():
     questions = {
@@ -320,7 +340,7 @@ def run_election_simulation():
     for i in range(num_voters):
         name = f"Voter{i+1}"
         national_id = f"ID{i+1:05d}"
-        biometric_signature = hashlib.sha256(f"bio{i+1}".encode()).hexdigest()[:32]
+        biometric_signature = hashlib.blake2b(f"bio{i+1}".encode(), digest_size=16).hexdigest()
         voter_id = voting_system.register_voter(name, national_id, biometric_signature)
         voter_ids.append(voter_id)
         print(f"Voter {i+1} registered with ID: {voter_id}")
@@ -329,11 +349,12 @@ def run_election_simulation():
     voting_system.print_tables()
 
     # Simulate voting process
+    voter_records = voting_system.election_authority.voter_records
     for voter_id in voter_ids:
         print(f"\nProcessing voter: {voter_id}")
         
         # Authorization
-        biometric_signature = voting_system.election_authority.voter_records[voter_id]["biometric_signature"]
+        biometric_signature = voter_records[voter_id]["biometric_signature"]
         auth_result = voting_system.authorize_voter(voter_id, biometric_signature)
         if not auth_result:
             print(f"Voter {voter_id} failed authorization")
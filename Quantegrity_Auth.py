@@ -1,15 +1,21 @@
 import hashlib
+import hmac
 import random
 import string
-from qiskit import QuantumCircuit, QuantumRegister, ClassicalRegister, transpile
+from qiskit import QuantumCircuit
 from qiskit_aer import AerSimulator
-import numpy as np
+
+# Characters used for ballot confirmation codes
+CODE_ALPHABET = string.ascii_uppercase + string.digits
 
 # Symmetrically Entangled Duetsch-Jozsa Oracle
 def sedjo(A, B):
     Sa = A[::-1]
     Sb = B[::-1]
     n = len(A)
+    # Qubits of each register that the secret keys act on
+    qubits_a = [i for i in range(n) if Sa[i] == '0']
+    qubits_b = [i+n+1 for i in range(n) if Sb[i] == '0']
     circuit = QuantumCircuit(2*n + 2, 2*n)
 
     # Initialize input register
@@ -30,13 +36,9 @@ def sedjo(A, B):
     # Layer 01
 
     # for Sa
-    for char in range(n):
-        if Sa[char] == '0':
-            circuit.z(char)
+    circuit.z(qubits_a)
     # for Sb
-    for char in range(n):
-        if Sb[char] == '0':
-            circuit.z(char+n+1)
+    circuit.z(qubits_b)
     circuit.barrier()
 
     # Layer 02
@@ -48,13 +50,9 @@ def sedjo(A, B):
     # Layer 03
 
     #for Sa
-    for char in range(n):
-        if Sa[char] == '0':
-            circuit.x(char)
+    circuit.x(qubits_a)
     #for Sb
-    for char in range(n):
-        if Sb[char] == '0':
-            circuit.x(char+n+1)
+    circuit.x(qubits_b)
     circuit.barrier()
 
     # Set output
@@ -71,7 +69,8 @@ def sedjo(A, B):
 
     # Execute the circuit
     #display(circuit.draw("mpl"))
-    result = AerSimulator().run(circuit, shots=1024, memory=True).result()
+    # a single shot yields the shared key pair
+    result = AerSimulator().run(circuit, shots=1).result()
     counts = result.get_counts()
     # return counts
     quantum_key = list(counts.keys())[0]
@@ -82,22 +81,27 @@ def sedjo(A, B):
 # Quantum Random Number Generator
 def qrng(n):
     circuit = QuantumCircuit(n, n)
-    for i in range(n):
-        circuit.h(i)
+    circuit.h(range(n))
     circuit.measure(range(n), range(n))
-    result = AerSimulator().run(circuit, shots=1024, memory=True).result()
+    result = AerSimulator().run(circuit, shots=1).result()
     counts = result.get_counts()
     quantum_key = list(counts.keys())[0]
     return quantum_key
 
 # xor definition
 def xor(a, b):
-    return ''.join([str(int(x) ^ int(y)) for x, y in zip(a, b)])
+    # XOR the bitstrings as integers; like zip(), stop at the shorter input
+    n = min(len(a), len(b))
+    if n == 0:
+        return ''
+    return format(int(a[:n], 2) ^ int(b[:n], 2), f'0{n}b')
 
 def hex_to_binary(hex_string):
   return bin(int(hex_string, 16))[2:]
 
 class Voter:
+    __slots__ = ("name", "national_id", "biometric_signature", "voter_id", "quantum_key")
+
     def __init__(self, name, national_id, biometric_signature):
         self.name = name
         self.national_id = national_id
@@ -106,7 +110,7 @@ class Voter:
         self.quantum_key = self.generate_quantum_key()
 
     def generate_voter_id(self):
-        return hashlib.sha256(f"{self.name}{self.national_id}{self.biometric_signature}".encode()).hexdigest()[:16]
+        return hashlib.blake2b(f"{self.name}{self.national_id}{self.biometric_signature}".encode(), digest_size=8).hexdigest()
 
     def generate_quantum_key(self):
         temp_key = qrng(128)
@@ -120,6 +124,7 @@ class ElectionAuthority:
         self.voter_records = {}
         self.candidates = []
         self.ballots = {}
+        self.tally = {}
 
     def register_voter(self, voter):
         if voter.national_id in self.registered_voters:
@@ -134,9 +139,9 @@ class ElectionAuthority:
         }
 
     def authorize_voter(self, voter_id, biometric_signature):
-        if voter_id not in self.voter_records:
+        voter = self.voter_records.get(voter_id)
+        if voter is None:
             return False
-        voter = self.voter_records[voter_id]
         if voter["biometric_signature"] != biometric_signature:
             return False
         if voter["has_voted"]:
@@ -145,6 +150,7 @@ class ElectionAuthority:
 
     def set_candidates(self, candidates):
         self.candidates = candidates
+        self.tally = {candidate: 0 for candidate in candidates}
 
     def generate_ballot(self, voter_id):
         if voter_id not in self.voter_records:
@@ -155,34 +161,37 @@ class ElectionAuthority:
         return ballot
 
     def cast_vote(self, voter_id, candidate, code):
-        if voter_id not in self.voter_records or voter_id not in self.ballots:
+        voter = self.voter_records.get(voter_id)
+        ballot = self.ballots.get(voter_id)
+        if voter is None or ballot is None:
             raise ValueError("Invalid voter ID")
-        if self.voter_records[voter_id]["has_voted"]:
+        if voter["has_voted"]:
             raise ValueError("Voter has already cast a vote")
 
-        ballot = self.ballots[voter_id]
         if ballot.cast_vote(candidate, code):
-            self.voter_records[voter_id]["has_voted"] = True
+            voter["has_voted"] = True
+            self.tally[candidate] += 1
             return True
         return False
 
     def get_results(self):
-        results = {candidate: 0 for candidate in self.candidates}
-        for ballot in self.ballots.values():
-            if ballot.status == "Cast" and ballot.marked_candidate:
-                results[ballot.marked_candidate] += 1
-        return results
+        # Tallies are updated as votes are cast
+        return dict(self.tally)
 
 class Ballot:
+    __slots__ = ("voter_id", "candidates", "codes", "marked_candidate", "status")
+
     def __init__(self, voter_id, candidates):
         self.voter_id = voter_id
         self.candidates = candidates
-        self.codes = {candidate: self.generate_code() for candidate in candidates}
+        self.codes = self.generate_codes()
         self.marked_candidate = None
         self.status = "Not Cast"  # Can be "Not Cast", "Cast", "Audited", or "Spoiled"
 
-    def generate_code(self):
-        return ''.join(random.choices(string.ascii_uppercase + string.digits, k=6))
+    def generate_codes(self):
+        # Draw the characters for every code on the ballot in a single call
+        chars = ''.join(random.choices(CODE_ALPHABET, k=6 * len(self.candidates)))
+        return {candidate: chars[6*i:6*i+6] for i, candidate in enumerate(self.candidates)}
 
     def cast_vote(self, candidate, code):
         if self.status != "Not Cast":
@@ -240,12 +249,7 @@ class QuantegrityVotingSystem:
         encrypted_otp = xor(authority_qk[:32], otp)
         # print(f"Encrypted OTP: {encrypted_otp}")
 
-        # Decrypt and transmit OTP
-        decrypted_otp = xor(voter_qk[:32], encrypted_otp)
-        # print(f"Decrypted OTP: {decrypted_otp}")
-        transmitted_otp = decrypted_otp
-        # print(f"Transmitted OTP: {transmitted_otp}")
-
+        # The voter-side decryption happens once, in validate_otp
         return encrypted_otp, voter_qk, authority_qk
 
     def validate_otp(self, voter_id, encrypted_otp, voter_qk, authority_qk):
@@ -253,7 +257,7 @@ class QuantegrityVotingSystem:
         transmitted_otp = xor(voter_qk[:32], encrypted_otp)
         # print(f"Expected OTP: {expected_otp}")
         # print(f"Transmitted OTP: {transmitted_otp}")
-        if expected_otp != transmitted_otp:
+        if not hmac.compare_digest(expected_otp, transmitted_otp):
             print("OTP validation failed")
             return False
         print("OTP validation passed")
@@ -280,7 +284,7 @@ def run_election_simulation(num_voters, candidates):
     for i in range(num_voters):
         name = f"Voter{i+1}"
         national_id = f"ID{i+1:05d}"
-        biometric_signature = hashlib.sha256(f"bio{i+1}".encode()).hexdigest()[:32]
+        biometric_signature = hashlib.blake2b(f"bio{i+1}".encode(), digest_size=16).hexdigest()
         voter_id = voting_system.register_voter(name, national_id, biometric_signature)
         voter_ids.append(voter_id)
         print(f"Voter {i+1} registered with ID: {voter_id}")
@@ -289,10 +293,12 @@ def run_election_simulation(num_voters, candidates):
     print_voter_info(voting_system)
 
     # Simulate voting process
+    voter_records = voting_system.election_authority.voter_records
     for voter_id in voter_ids:
         # Authorization
-        biometric_signature = voting_system.election_authority.voter_records[voter_id]["biometric_signature"]
-        quantum_key = voting_system.election_authority.voter_records[voter_id]["quantum_key"]
+        voter_record = voter_records[voter_id]
+        biometric_signature = voter_record["biometric_signature"]
+        quantum_key = voter_record["quantum_key"]
         encrypted_otp, voter_qk, ea_qk = voting_system.authorize_voter(voter_id, biometric_signature, quantum_key)
         if not encrypted_otp:
             print(f"Voter {voter_id} failed authorization")
@@ -329,15 +335,17 @@ def run_invalid_voter_tests(voting_system):
     print(f"Unregistered voter authorization: {'Failed' if not result else 'Passed'}")
 
     # Test 2: Wrong biometric signature
-    registered_voter_id = list(voting_system.election_authority.voter_records.keys())[0]
+    voter_records = voting_system.election_authority.voter_records
+    registered_voter_id = next(iter(voter_records))
+    voter_record = voter_records[registered_voter_id]
     wrong_biometric = "wrong_biometric_signature"
-    registered_quantum_key = voting_system.election_authority.voter_records[registered_voter_id]["quantum_key"]
+    registered_quantum_key = voter_record["quantum_key"]
     result = voting_system.authorize_voter(registered_voter_id, wrong_biometric, registered_quantum_key)
     print(f"Wrong biometric signature: {'Failed' if not result else 'Passed'}")
 
     # Test 3: Double voting
-    biometric_signature = voting_system.election_authority.voter_records[registered_voter_id]["biometric_signature"]
-    quantum_key = voting_system.election_authority.voter_records[registered_voter_id]["quantum_key"]
+    biometric_signature = voter_record["biometric_signature"]
+    quantum_key = voter_record["quantum_key"]
     voting_system.authorize_voter(registered_voter_id, biometric_signature, quantum_key)
     ballot = voting_system.get_ballot(registered_voter_id)
     candidate = voting_system.election_authority.candidates[0]
@@ -350,12 +358,12 @@ def run_invalid_voter_tests(voting_system):
 # Print voter information
 def print_voter_info(voting_system):
     for voter_id, voter_info in voting_system.election_authority.voter_records.items():
-        print(f"Voter ID: {voter_id}")
-        print(f"Name: {voter_info['name']}")
-        print(f"National ID: {voter_info['national_id']}")
-        print(f"Biometric Signature: {voter_info['biometric_signature']}")
-        print(f"Has Voted: {voter_info['has_voted']}")
-        print("\n")
+        print(f"Voter ID: {voter_id}\n"
+              f"Name: {voter_info['name']}\n"
+              f"National ID: {voter_info['national_id']}\n"
+              f"Biometric Signature: {voter_info['biometric_signature']}\n"
+              f"Has Voted: {voter_info['has_voted']}\n"
+              "\n")
 
 
 # Run the simulation and tests
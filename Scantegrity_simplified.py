@@ -1,16 +1,27 @@
 import random
 import string
 
+# Characters used for ballot confirmation codes
+CODE_ALPHABET = string.ascii_uppercase + string.digits
+
 class Ballot:
+    __slots__ = ("ballot_id", "questions", "codes", "marked_options", "status")
+
     def __init__(self, ballot_id, questions):
         self.ballot_id = ballot_id
         self.questions = questions
-        self.codes = {q: {o: self.generate_code() for o in options} for q, options in questions.items()}
+        self.codes = self.generate_codes()
         self.marked_options = {}
         self.status = "Not Cast"  # Can be "Not Cast", "Cast", "Audited", or "Spoiled"
 
-    def generate_code(self):
-        return ''.join(random.choices(string.ascii_uppercase + string.digits, k=3))
+    def generate_codes(self):
+        # Draw the characters for every code on the ballot in a single call
+        options = [(q, o) for q, opts in self.questions.items() for o in opts]
+        chars = ''.join(random.choices(CODE_ALPHABET, k=3 * len(options)))
+        codes = {q: {} for q in self.questions}
+        for i, (q, o) in enumerate(options):
+            codes[q][o] = chars[3*i:3*i+3]
+        return codes
 
     def mark(self, question, option):
         self.marked_options[question] = option
@@ -26,6 +37,7 @@ class ElectionSystem:
         self.table_q = self.create_table_q()
         self.table_s = self.create_table_s()
         self.tables_r = [self.create_table_r() for _ in range(10)]  # 40 R tables as per Takoma Park example
+        self.r_entries_by_q, self.r_entries_by_ballot = self.index_tables_r()
         self.cast_votes = []
         self.audited_ballots = []
         self.spoiled_ballots = []
@@ -46,31 +58,38 @@ class ElectionSystem:
         table_r = []
         for ballot in self.ballots:
             for question, options in self.questions.items():
+                options = list(options)
                 for i, code in enumerate(self.table_q[ballot.ballot_id][question]):
                     q_pointer = (ballot.ballot_id, question, i)
-                    s_pointer = (question, list(options)[i % len(options)])
+                    s_pointer = (question, options[i % len(options)])
                     table_r.append({"flag": False, "q_pointer": q_pointer, "s_pointer": s_pointer})
         random.shuffle(table_r)
         return table_r
 
+    def index_tables_r(self):
+        # Index R table entries by Q-pointer and by ballot so that casting
+        # or spoiling a ballot does not scan every table
+        by_q = {}
+        by_ballot = {}
+        for table_r in self.tables_r:
+            for entry in table_r:
+                by_q.setdefault(entry["q_pointer"], []).append(entry)
+                by_ballot.setdefault(entry["q_pointer"][0], []).append(entry)
+        return by_q, by_ballot
+
     def cast_vote(self, ballot, choices):
         if ballot.status == "Not Cast":
-            for question, option in choices.items():
-                ballot.mark(question, option)
             ballot.status = "Cast"
             for question, option in choices.items():
+                ballot.mark(question, option)
                 code = ballot.get_code(question)
                 self.cast_votes.append((ballot.ballot_id, question, code))
 
                 # Update Tables R and S
-                for table_r in self.tables_r:
-                    for entry in table_r:
-                        if (entry["q_pointer"][0] == ballot.ballot_id and
-                            entry["q_pointer"][1] == question and
-                            self.table_q[ballot.ballot_id][question][entry["q_pointer"][2]] == code):
-                            entry["flag"] = True
-                            self.table_s[question][option].add(code)
-                            break
+                q_pointer = (ballot.ballot_id, question, self.table_q[ballot.ballot_id][question].index(code))
+                for entry in self.r_entries_by_q.get(q_pointer, ()):
+                    entry["flag"] = True
+                    self.table_s[question][option].add(code)
         else:
             raise ValueError("Ballot has already been cast, audited, or spoiled")
 
@@ -86,10 +105,8 @@ class ElectionSystem:
             ballot.status = "Spoiled"
             self.spoiled_ballots.append(ballot)
             # Reveal all information for this ballot in all R tables
-            for table_r in self.tables_r:
-                for entry in table_r:
-                    if entry["q_pointer"][0] == ballot.ballot_id:
-                        entry["flag"] = True
+            for entry in self.r_entries_by_ballot.get(ballot.ballot_id, ()):
+                entry["flag"] = True
         else:
             raise ValueError("Ballot has already been cast, audited, or spoiled")
 
@@ -97,44 +114,40 @@ class ElectionSystem:
         return {q: {o: len(codes) for o, codes in options.items()} for q, options in self.table_s.items()}
 
 def print_tables(election_system):
-    print("Table Q:")
+    lines = ["Table Q:"]
     for ballot_id, questions in election_system.table_q.items():
-        print(f"{ballot_id}:")
-        for question, codes in questions.items():
-            print(f"  {question}: {codes}")
-    print()
+        lines.append(f"{ballot_id}:")
+        lines.extend(f"  {question}: {codes}" for question, codes in questions.items())
+    lines.append("")
 
-    print("Table S:")
+    lines.append("Table S:")
     for question, options in election_system.table_s.items():
-        print(f"{question}:")
-        for option, codes in options.items():
-            print(f"  {option}: {codes}")
-    print()
+        lines.append(f"{question}:")
+        lines.extend(f"  {option}: {codes}" for option, codes in options.items())
+    lines.append("")
 
-    print("Tables R (showing only the first table):")
-    for entry in election_system.tables_r[0]:
-        print(f"Flag: {entry['flag']}, Q-Pointer: {entry['q_pointer']}, S-Pointer: {entry['s_pointer']}")
-    print()
+    lines.append("Tables R (showing only the first table):")
+    lines.extend(f"Flag: {entry['flag']}, Q-Pointer: {entry['q_pointer']}, S-Pointer: {entry['s_pointer']}"
+                 for entry in election_system.tables_r[0])
+    lines.append("")
+    print("\n".join(lines))
 
 def print_results(election_system):
     tally = election_system.get_tally()
-    print("Election Results:")
+    lines = ["Election Results:"]
     for question, options in tally.items():
-        print(f"{question}:")
-        for option, votes in options.items():
-            print(f"  {option}: {votes} votes")
+        lines.append(f"{question}:")
+        lines.extend(f"  {option}: {votes} votes" for option, votes in options.items())
 
-    print("\nCast Votes (Ballot ID, Question, Code):")
-    for vote in election_system.cast_votes:
-        print(f"{vote[0]}, {vote[1]}: {vote[2]}")
+    lines.append("\nCast Votes (Ballot ID, Question, Code):")
+    lines.extend(f"{vote[0]}, {vote[1]}: {vote[2]}" for vote in election_system.cast_votes)
 
-    print("\nAudited Ballots:")
-    for ballot in election_system.audited_ballots:
-        print(ballot.ballot_id)
+    lines.append("\nAudited Ballots:")
+    lines.extend(ballot.ballot_id for ballot in election_system.audited_ballots)
 
-    print("\nSpoiled Ballots:")
-    for ballot in election_system.spoiled_ballots:
-        print(ballot.ballot_id)
+    lines.append("\nSpoiled Ballots:")
+    lines.extend(ballot.ballot_id for ballot in election_system.spoiled_ballots)
+    print("\n".join(lines))
 
 def main():
     num_voters = 5
@@ -148,13 +161,11 @@ def main():
     print_tables(election_system)
 
     for ballot in election_system.ballots:
-        print(f"Ballot ID: {ballot.ballot_id}")
-        print(f"Status: {ballot.status}")
+        lines = [f"Ballot ID: {ballot.ballot_id}", f"Status: {ballot.status}"]
         for question, options in ballot.codes.items():
-            print(f"{question}:")
-            for option, code in options.items():
-                print(f"  {option}: {code}")
-        print()
+            lines.append(f"{question}:")
+            lines.extend(f"  {option}: {code}" for option, code in options.items())
+        print("\n".join(lines) + "\n")
 
         action = input("Choose an action (vote/audit/spoil/skip): ").lower()
         if action == "vote":